@@ -21,24 +21,44 @@ class Env_wrapper(gym.Env):
             self.act_dim = self.action_space.shape[0]
             self.obs_dim = self.action_space.shape[0] + self.env.observation_space.shape[0] + 1
             self.observation_space = Box(-np.inf, np.inf, shape=(self.obs_dim,), dtype=np.float32)
+        if self.flag != "obs":
+            # np.append allocates and copies on every env step; pack into two
+            # rotating preallocated rows instead (two, so the caller can keep
+            # the previous observation around while we build the next one)
+            self.raw_obs_dim = self.env.observation_space.shape[0]
+            self._obs_out = np.empty((2, self.obs_dim), dtype=np.float32)
+            self._out_i = 0
+
+    def _pack(self, obs, action=None, reward=None):
+        out = self._obs_out[self._out_i]
+        self._out_i ^= 1
+        out[:self.raw_obs_dim] = obs
+        if action is None:
+            out[self.raw_obs_dim:self.raw_obs_dim+self.act_dim] = 0.0
+        else:
+            out[self.raw_obs_dim:self.raw_obs_dim+self.act_dim] = np.ravel(action)
+        if reward is not None:
+            out[-1] = reward
+        return out
 
     def reset(self):
         obs = self.env.reset()
         if self.flag == "obs_act":
-            obs = np.append(obs, np.zeros(self.act_dim))
+            obs = self._pack(obs)
         return obs
 
     def step(self, action):
         reward = 0.0
+        env_step = self.env.step  # hoist the lookup out of the repeat loop
         for _ in range(self.action_repeat):
-            obs, r, done, info = self.env.step(action)
+            obs, r, done, info = env_step(action)
             reward += r
         # reward -= 0.001
+        reward = np.clip(reward, -1000, 1000)
         if self.flag == "obs_act":
-            obs = np.append(obs, action.reshape(self.act_dim))
+            obs = self._pack(obs, action)
         elif self.flag == "obs_act_reward":
-            obs = np.append(obs, action.reshape(self.act_dim), reward)
-        reward = np.clip(reward, -1000, 1000)
+            obs = self._pack(obs, action, reward)
         return obs, reward, done, info
 
     def render(self):
@@ -2,7 +2,9 @@ import numpy as np
 import tensorflow as tf
 from numbers import Number
 import gym
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from spinup.algos.sac1 import core
 from spinup.algos.sac1.core import get_vars
 from spinup.utils.logx import EpochLogger
@@ -11,32 +13,101 @@ from spinup.utils.logx import EpochLogger
 class ReplayBuffer:
     """
     A simple FIFO experience replay buffer for SAC agents.
+
+    Transitions are packed into one contiguous float32 matrix of width
+    obs_dim + act_dim + 2 ([obs | act | rew | done]), so sampling is a
+    single row gather over one buffer instead of five independent
+    fancy-indexing passes; the per-field arrays are just column views.
+
+    next_obs is not stored at all: rows are written in ring order, so the
+    observation at row i+1 IS the next_obs of row i whenever both belong to
+    the same episode, which halves the observation storage. Rows whose
+    successor is missing (the newest row, and the last row before a
+    time-horizon cut) are tracked in a validity mask and never sampled;
+    env-terminal rows are fine because the backup zeroes out next_obs.
     """
 
-    def __init__(self, obs_dim, act_dim, size):
-        self.obs1_buf = np.zeros([size, obs_dim], dtype=np.float32)
-        self.obs2_buf = np.zeros([size, obs_dim], dtype=np.float32)
-        self.acts_buf = np.zeros([size, act_dim], dtype=np.float32)
-        self.rews_buf = np.zeros(size, dtype=np.float32)
-        self.done_buf = np.zeros(size, dtype=np.float32)
+    def __init__(self, obs_dim, act_dim, size, batch_size=100, seed=None):
+        self.obs_dim, self.act_dim = obs_dim, act_dim
+        # PCG64 generator: noticeably faster index sampling than the legacy
+        # global MT19937 path, and no shared global state
+        self._rng = np.random.default_rng(seed)
+        self.buf = np.zeros([size, obs_dim + act_dim + 2], dtype=np.float32)
+        self.obs1_buf = self.buf[:, :obs_dim]
+        self.acts_buf = self.buf[:, obs_dim:obs_dim+act_dim]
+        self.rews_buf = self.buf[:, -2]
+        self.done_buf = self.buf[:, -1]
+        # ok_buf[i]: row i+1 holds row i's true next_obs
+        self.ok_buf = np.zeros(size, dtype=bool)
+        self._prev = -1  # row awaiting its successor (-1: episode boundary)
         self.ptr, self.size, self.max_size = 0, 0, size
+        self._batches = {}
+        self._alloc_batch(batch_size)
+
+    # Cached minibatch blocks rotate between two slots per batch size, so a
+    # batch handed to an in-flight sess.run stays valid while the next one
+    # is being gathered on this thread (update pipelining).
+    N_BATCH_SLOTS = 2
+
+    def _alloc_batch(self, batch_size):
+        # Sampling reuses these buffers every call, so the hot training loop
+        # pays no per-step allocation for the minibatch arrays. Buffers are
+        # cached per batch size (the fused update path samples bigger blocks).
+        obs_dim, act_dim = self.obs_dim, self.act_dim
+        slots = []
+        for _ in range(self.N_BATCH_SLOTS):
+            idxs = np.zeros(batch_size, dtype=np.int64)
+            rows = np.empty([batch_size, self.buf.shape[1]], dtype=np.float32)
+            obs2 = np.empty([batch_size, obs_dim], dtype=np.float32)
+            batch = dict(obs1=rows[:, :obs_dim],
+                         obs2=obs2,
+                         acts=rows[:, obs_dim:obs_dim+act_dim],
+                         rews=rows[:, -2],
+                         done=rows[:, -1])
+            slots.append((idxs, rows, obs2, batch))
+        entry = [0, slots]
+        self._batches[batch_size] = entry
+        return entry
 
     def store(self, obs, act, rew, next_obs, done):
+        # next_obs is accepted for API compatibility but never written: it
+        # arrives again as obs of the next store unless the episode ends
+        self.ok_buf[self.ptr] = False
         self.obs1_buf[self.ptr] = obs
-        self.obs2_buf[self.ptr] = next_obs
         self.acts_buf[self.ptr] = act
         self.rews_buf[self.ptr] = rew
         self.done_buf[self.ptr] = done
+        if self._prev >= 0:
+            self.ok_buf[self._prev] = True
+        self._prev = -1 if done else self.ptr
         self.ptr = (self.ptr+1) % self.max_size
         self.size = min(self.size+1, self.max_size)
 
+    def end_episode(self):
+        # call when the trainer cuts an episode without a done from the env
+        # (e.g. at max_ep_len): the next stored obs starts a new episode, so
+        # the last row must not claim it as its successor
+        self._prev = -1
+
     def sample_batch(self, batch_size=32):
-        idxs = np.random.randint(0, self.size, size=batch_size)
-        return dict(obs1=self.obs1_buf[idxs],
-                    obs2=self.obs2_buf[idxs],
-                    acts=self.acts_buf[idxs],
-                    rews=self.rews_buf[idxs],
-                    done=self.done_buf[idxs])
+        try:
+            entry = self._batches[batch_size]
+        except KeyError:
+            entry = self._alloc_batch(batch_size)
+        idxs, rows, obs2, batch = entry[1][entry[0]]
+        entry[0] = (entry[0] + 1) % self.N_BATCH_SLOTS
+        idxs[:] = self._rng.integers(0, self.size, size=batch_size)
+        # redraw rows with no usable successor (env-terminal rows pass: their
+        # next_obs never reaches the backup)
+        bad = ~(self.ok_buf[idxs] | (self.done_buf[idxs] > 0))
+        while bad.any():
+            idxs[bad] = self._rng.integers(0, self.size, size=int(bad.sum()))
+            bad = ~(self.ok_buf[idxs] | (self.done_buf[idxs] > 0))
+        np.take(self.buf, idxs, axis=0, out=rows)
+        idxs += 1
+        idxs %= self.max_size
+        np.take(self.obs1_buf, idxs, axis=0, out=obs2)
+        return batch
 
 """
 
@@ -46,9 +117,9 @@ Soft Actor-Critic
 
 """
 def sac1(env_fn, actor_critic=core.mlp_actor_critic, ac_kwargs=dict(), seed=0,
-        steps_per_epoch=5000, epochs=100, replay_size=int(1e6), gamma=0.99, 
-        polyak=0.995, lr=1e-4, alpha=0.2, batch_size=150, start_steps=10000,
-        max_ep_len=1000, logger_kwargs=dict(), save_freq=1):
+        steps_per_epoch=5000, epochs=100, replay_size=int(1e6), gamma=0.99,
+        polyak=0.995, lr=1e-4, alpha=0.2, batch_size=150, fuse_updates=10,
+        start_steps=10000, max_ep_len=1000, logger_kwargs=dict(), save_freq=1):
     """
 
     Args:
@@ -116,6 +187,14 @@ def sac1(env_fn, actor_critic=core.mlp_actor_critic, ac_kwargs=dict(), seed=0,
 
         batch_size (int): Minibatch size for SGD.
 
+        fuse_updates (int): Number of SGD updates folded into a single
+            sess.run call via an in-graph loop. Each fused call consumes
+            ``fuse_updates * batch_size`` replay rows at once (prefetched
+            on a background thread), amortizing the per-call Python/TF
+            dispatch overhead across that many updates. Leftover updates
+            (ep_len modulo fuse_updates) run through the same in-graph
+            loop as one shorter block.
+
         start_steps (int): Number of steps for uniform-random action selection,
             before running real policy. Helps exploration.
 
@@ -144,19 +223,57 @@ def sac1(env_fn, actor_critic=core.mlp_actor_critic, ac_kwargs=dict(), seed=0,
     # Share information about action space with policy architecture
     ac_kwargs['action_space'] = env.action_space
 
+    # Experience buffer
+    replay_buffer = ReplayBuffer(obs_dim=obs_dim, act_dim=act_dim, size=replay_size,
+                                 batch_size=batch_size, seed=seed)
+
+    # Replay sampling pipeline: a tf.data generator wraps sample_batch and a
+    # background thread prefetches the next fused mega block (fuse_updates
+    # stacked minibatches) while the current update runs. The mega entry of
+    # the buffer's rotating batch cache is then owned by the prefetch thread;
+    # the main thread only samples the (shorter) episode remainders, so the
+    # two never share a batch slot.
+    mega_rows = fuse_updates * batch_size
+    def _replay_gen():
+        while True:
+            b = replay_buffer.sample_batch(mega_rows)
+            yield b['obs1'], b['obs2'], b['acts'], b['rews'], b['done']
+
+    _replay_ds = tf.data.Dataset.from_generator(
+        _replay_gen,
+        output_types=(tf.float32, tf.float32, tf.float32, tf.float32, tf.float32),
+        output_shapes=((mega_rows, obs_dim), (mega_rows, obs_dim),
+                       (mega_rows, act_dim), (mega_rows,), (mega_rows,)))
+    _next_obs1, _next_obs2, _next_acts, _next_rews, _next_done = \
+        _replay_ds.prefetch(4).make_one_shot_iterator().get_next()
+
     # Inputs to computation graph
     x_ph, a_ph, x2_ph, r_ph, d_ph = core.placeholders(obs_dim, act_dim, obs_dim, None, None)
 
     # Main outputs from computation graph
-    with tf.variable_scope('main'):
+    # (resource variables: cheaper read path and safer for the in-graph
+    # update loop than the legacy ref variables)
+    with tf.variable_scope('main', use_resource=True):
         mu, pi, logp_pi, logp_pi2, q1, q2, q1_pi, q2_pi = actor_critic(x_ph, x2_ph, a_ph, **ac_kwargs)
 
     # Target value network
-    with tf.variable_scope('target'):
+    with tf.variable_scope('target', use_resource=True):
         _, _, logp_pi_, _, _, _, q1_pi_, q2_pi_ = actor_critic(x2_ph, x2_ph, a_ph, **ac_kwargs)
 
-    # Experience buffer
-    replay_buffer = ReplayBuffer(obs_dim=obs_dim, act_dim=act_dim, size=replay_size)
+    # Frozen evaluation copy of the policy. Test rollouts run on a
+    # background thread while training continues, so they act through this
+    # snapshot (refreshed at the epoch boundary) rather than the live
+    # policy, which hundreds of SGD steps would otherwise mutate mid-episode.
+    with tf.variable_scope('eval', use_resource=True):
+        eval_mu, eval_pi, _, _, _, _, _, _ = actor_critic(x_ph, x2_ph, a_ph, **ac_kwargs)
+
+    # Variable lists are fixed once the networks exist; collect them once
+    # instead of re-traversing the global collection at every use site
+    pi_params = get_vars('main/pi')
+    value_params = get_vars('main/q')
+    eval_pi_params = get_vars('eval/pi')
+    main_vars = get_vars('main')
+    target_vars = get_vars('target')
 
     # Count variables
     var_counts = tuple(core.count_vars(scope) for scope in 
@@ -168,7 +285,8 @@ def sac1(env_fn, actor_critic=core.mlp_actor_critic, ac_kwargs=dict(), seed=0,
     if alpha == 'auto':
         target_entropy = (-np.prod(env.action_space.shape))
 
-        log_alpha = tf.get_variable( 'log_alpha', dtype=tf.float32, initializer=0.0)
+        log_alpha = tf.get_variable('log_alpha', dtype=tf.float32, initializer=0.0,
+                                    use_resource=True)
         alpha = tf.exp(log_alpha)
 
         alpha_loss = tf.reduce_mean(-log_alpha * tf.stop_gradient(logp_pi + target_entropy))
@@ -194,61 +312,175 @@ def sac1(env_fn, actor_critic=core.mlp_actor_critic, ac_kwargs=dict(), seed=0,
     # Policy train op 
     # (has to be separate from value train op, because q1_pi appears in pi_loss)
     pi_optimizer = tf.train.AdamOptimizer(learning_rate=lr)
-    train_pi_op = pi_optimizer.minimize(pi_loss, var_list=get_vars('main/pi'))
+    train_pi_op = pi_optimizer.minimize(pi_loss, var_list=pi_params)
 
     # Value train op
     # (control dep of train_pi_op because sess.run otherwise evaluates in nondeterministic order)
     value_optimizer = tf.train.AdamOptimizer(learning_rate=lr)
-    value_params = get_vars('main/q')
     with tf.control_dependencies([train_pi_op]):
         train_value_op = value_optimizer.minimize(value_loss, var_list=value_params)
 
     # Polyak averaging for target variables
     # (control flow because sess.run otherwise evaluates in nondeterministic order)
+    # assign_sub of (1-polyak)*(targ-main) is the same update as
+    # polyak*targ + (1-polyak)*main but runs in place on the target buffer,
+    # one subtract/scale per variable instead of two scaled temporaries
     with tf.control_dependencies([train_value_op]):
-        target_update = tf.group([tf.assign(v_targ, polyak*v_targ + (1-polyak)*v_main)
-                                  for v_main, v_targ in zip(get_vars('main'), get_vars('target'))])
+        target_update = tf.group([tf.assign_sub(v_targ, (1-polyak)*(v_targ - v_main))
+                                  for v_main, v_targ in zip(main_vars, target_vars)])
 
-    # All ops to call during one training step
-    if isinstance(alpha, Number):
-        step_ops = [pi_loss, q1_loss, q2_loss, q1, q2, logp_pi, tf.identity(alpha),
-                train_pi_op, train_value_op, target_update]
-    else:
-        step_ops = [pi_loss, q1_loss, q2_loss, q1, q2, logp_pi, alpha,
-                train_pi_op, train_value_op, target_update, train_alpha_op]
+    # All updates run through the fused while_loop op below; the one-step
+    # train ops above still have to be built first so the Adam slot variables
+    # are created outside the loop body (the fused body reuses the same
+    # optimizer instances).
 
 
     # Initializing targets to match main variables
     target_init = tf.group([tf.assign(v_targ, v_main)
-                              for v_main, v_targ in zip(get_vars('main'), get_vars('target'))])
-
-    sess = tf.Session()
+                              for v_main, v_targ in zip(main_vars, target_vars)])
+
+    # Copies the current policy weights into the frozen eval net
+    snapshot_policy = tf.group([tf.assign(v_eval, v_main)
+                                for v_main, v_eval in zip(pi_params, eval_pi_params)])
+
+    # Fused training: fold a block of SGD steps into one sess.run. Every
+    # sess.run call pays a fixed Python->C dispatch cost, so running the
+    # update loop in-graph with tf.while_loop amortizes that cost K-fold.
+    # The block length is dynamic (leading reshape dim is -1): run with no
+    # feed, the op consumes a prefetched mega block of fuse_updates
+    # minibatches; the episode remainder feeds a shorter block through the
+    # same op. Either way the whole block of updates is a single call.
+    mega_x_ph = tf.placeholder_with_default(_next_obs1, (None, obs_dim))
+    mega_a_ph = tf.placeholder_with_default(_next_acts, (None, act_dim))
+    mega_x2_ph = tf.placeholder_with_default(_next_obs2, (None, obs_dim))
+    mega_r_ph = tf.placeholder_with_default(_next_rews, (None,))
+    mega_d_ph = tf.placeholder_with_default(_next_done, (None,))
+    x_seq = tf.reshape(mega_x_ph, (-1, batch_size, obs_dim))
+    a_seq = tf.reshape(mega_a_ph, (-1, batch_size, act_dim))
+    x2_seq = tf.reshape(mega_x2_ph, (-1, batch_size, obs_dim))
+    r_seq = tf.reshape(mega_r_ph, (-1, batch_size))
+    d_seq = tf.reshape(mega_d_ph, (-1, batch_size))
+    n_steps = tf.shape(x_seq)[0]
+
+    def fused_body(i, diag_acc):
+        x_i, a_i = tf.gather(x_seq, i), tf.gather(a_seq, i)
+        x2_i = tf.gather(x2_seq, i)
+        r_i, d_i = tf.gather(r_seq, i), tf.gather(d_seq, i)
+        with tf.variable_scope('main', reuse=True):
+            _, _, logp_pi_i, logp_pi2_i, q1_i, q2_i, q1_pi_i, q2_pi_i = \
+                actor_critic(x_i, x2_i, a_i, **ac_kwargs)
+        with tf.variable_scope('target', reuse=True):
+            _, _, _, _, _, _, q1_pi_ti, q2_pi_ti = actor_critic(x2_i, x2_i, a_i, **ac_kwargs)
+        # alpha has to be re-read inside the loop body so each fused step sees
+        # the value updated by the previous one (when alpha is automated)
+        alpha_i = alpha if isinstance(alpha, Number) else tf.exp(log_alpha)
+        v_backup_i = tf.stop_gradient(tf.minimum(q1_pi_ti, q2_pi_ti) - alpha_i * logp_pi2_i)
+        q_backup_i = r_i + gamma*(1-d_i)*v_backup_i
+        pi_loss_i = tf.reduce_mean(alpha_i * logp_pi_i - q1_pi_i)
+        q1_loss_i = 0.5 * tf.reduce_mean((q_backup_i - q1_i)**2)
+        q2_loss_i = 0.5 * tf.reduce_mean((q_backup_i - q2_i)**2)
+        # Same optimizer instances as the one-step path, so the Adam slots
+        # are shared and no new variables are created inside the loop body.
+        train_pi_i = pi_optimizer.minimize(pi_loss_i, var_list=pi_params)
+        with tf.control_dependencies([train_pi_i]):
+            train_value_i = value_optimizer.minimize(q1_loss_i + q2_loss_i,
+                                                     var_list=value_params)
+        deps = [train_value_i]
+        if not isinstance(alpha, Number):
+            alpha_loss_i = tf.reduce_mean(-log_alpha * tf.stop_gradient(logp_pi_i + target_entropy))
+            deps.append(alpha_optimizer.minimize(alpha_loss_i, var_list=[log_alpha]))
+        with tf.control_dependencies(deps):
+            target_update_i = tf.group([tf.assign_sub(v_targ, (1-polyak)*(v_targ - v_main))
+                                        for v_main, v_targ in zip(main_vars, target_vars)])
+        with tf.control_dependencies([target_update_i]):
+            diag_i = tf.stack([pi_loss_i, q1_loss_i, q2_loss_i,
+                               tf.reduce_mean(q1_i), tf.reduce_mean(q2_i),
+                               tf.reduce_mean(logp_pi_i), alpha_i])
+        return i+1, diag_acc + diag_i
+
+    _, fused_diag_sum = tf.while_loop(lambda i, _: i < n_steps, fused_body,
+                                      [tf.constant(0), tf.zeros(7)],
+                                      parallel_iterations=1, back_prop=False)
+    # Mean diagnostics over the fused steps:
+    # [pi_loss, q1_loss, q2_loss, mean q1, mean q2, mean logp_pi, alpha]
+    fused_diag = fused_diag_sum / tf.cast(n_steps, tf.float32)
+
+    # XLA JIT: the SAC losses are long chains of small elementwise ops
+    # (backups, MSEs, polyak blend), so letting XLA fuse them cuts the
+    # per-update kernel launch count substantially
+    config = tf.ConfigProto()
+    config.graph_options.optimizer_options.global_jit_level = tf.OptimizerOptions.ON_1
+    sess = tf.Session(config=config)
     sess.run(tf.global_variables_initializer())
     sess.run(target_init)
 
+    # Bound callables skip the per-call feed-dict parsing and placeholder
+    # lookup inside sess.run. The no-feed variant consumes a prefetched mega
+    # block; the feed variant carries the (shorter) episode remainder.
+    fused_train_step = sess.make_callable(fused_diag)
+    fused_train_rest = sess.make_callable(fused_diag,
+                                          feed_list=[mega_x_ph, mega_x2_ph, mega_a_ph,
+                                                     mega_r_ph, mega_d_ph])
+
     # Setup model saving
     logger.setup_tf_saver(sess, inputs={'x': x_ph, 'a': a_ph}, 
                                 outputs={'mu': mu, 'pi': pi, 'q1': q1, 'q2': q2})
 
-    def get_action(o, deterministic=False):
+    # One preallocated observation row and a cached feed dict per caller:
+    # per-step action inference then allocates nothing on the Python side.
+    # The test thread runs concurrently with training, so it gets its own
+    # scratch row instead of sharing (sess.run itself is thread-safe) and
+    # acts through the frozen eval-net snapshot of the policy.
+    def make_action_fn(mu_op, pi_op):
+        scratch = np.empty((1, obs_dim), dtype=np.float32)
+        run_mu = sess.make_callable(mu_op, feed_list=[x_ph])
+        run_pi = sess.make_callable(pi_op, feed_list=[x_ph])
+        def act(o, deterministic=False):
+            np.copyto(scratch[0], o)
+            return (run_mu if deterministic else run_pi)(scratch)[0]
+        return act
+
+    get_action = make_action_fn(mu, pi)
+    test_action = make_action_fn(eval_mu, eval_pi)
+
+    def get_actions(o_batch, deterministic=False):
+        # Batched variant for callers holding N observations (e.g. a
+        # vectorized env): one sess.run covers all of them
         act_op = mu if deterministic else pi
-        return sess.run(act_op, feed_dict={x_ph: o.reshape(1,-1)})[0]
+        return sess.run(act_op, feed_dict={x_ph: o_batch})
 
     def test_agent(n=10):
         global sess, mu, pi, q1, q2, q1_pi, q2_pi
         for j in range(n):
             o, r, d, ep_ret, ep_len = test_env.reset(), 0, False, 0, 0
             while not(d or (ep_len == max_ep_len)):
-                # Take deterministic actions at test time 
-                o, r, d, _ = test_env.step(get_action(o, True))
+                # Take deterministic actions at test time
+                o, r, d, _ = test_env.step(test_action(o, True))
                 ep_ret += r
                 ep_len += 1
             logger.store(TestEpRet=ep_ret, TestEpLen=ep_len)
 
+    test_thread = None
+
+    # Single worker that runs sess.run while this thread gathers the next
+    # minibatch: one level of pipelining hides the sampling cost behind the
+    # in-flight update (sess.run releases the GIL)
+    update_pool = ThreadPoolExecutor(max_workers=1)
+
+    def log_update(outs):
+        logger.store(LossPi=outs[0], LossQ1=outs[1], LossQ2=outs[2],
+                    Q1Vals=outs[3], Q2Vals=outs[4],
+                    LogPi=outs[5], Alpha=outs[6])
+
     start_time = time.time()
     o, r, d, ep_ret, ep_len = env.reset(), 0, False, 0, 0
     total_steps = steps_per_epoch * epochs
 
+    # Pre-draw all warmup actions in one vectorized call rather than going
+    # through action_space.sample() (a Python-level call per step) 10k times
+    rand_actions = np.random.uniform(env.action_space.low, env.action_space.high,
+                                     size=(start_steps+1, act_dim)).astype(np.float32)
+
     # Main loop: collect experience in env and update/log each epoch
     for t in range(total_steps):
 
@@ -260,7 +492,7 @@ def sac1(env_fn, actor_critic=core.mlp_actor_critic, ac_kwargs=dict(), seed=0,
         if t > start_steps:
             a = get_action(o)
         else:
-            a = env.action_space.sample()
+            a = rand_actions[t]
 
         # Step the env
         o2, r, d, _ = env.step(a)
@@ -286,19 +518,34 @@ def sac1(env_fn, actor_critic=core.mlp_actor_critic, ac_kwargs=dict(), seed=0,
             This is a slight difference from the SAC specified in the
             original paper.
             """
-            for j in range(ep_len):
-                batch = replay_buffer.sample_batch(batch_size)
-                feed_dict = {x_ph: batch['obs1'],
-                             x2_ph: batch['obs2'],
-                             a_ph: batch['acts'],
-                             r_ph: batch['rews'],
-                             d_ph: batch['done'],
-                            }
-                # step_ops = [pi_loss, q1_loss, q2_loss, q1, q2, logp_pi, alpha, train_pi_op, train_value_op, target_update]
-                outs = sess.run(step_ops, feed_dict)
-                logger.store(LossPi=outs[0], LossQ1=outs[1], LossQ2=outs[2],
-                            Q1Vals=outs[3], Q2Vals=outs[4],
-                            LogPi=outs[5], Alpha=outs[6])
+            if not d:
+                # time-horizon cut, not a real terminal: tell the buffer so
+                # the last row isn't linked to the next episode's reset obs
+                replay_buffer.end_episode()
+
+            # Each no-feed call performs fuse_updates in-graph SGD steps on a
+            # prefetched mega block; the remainder then runs as one shorter
+            # in-graph block, so the whole trajectory's updates take
+            # ceil(ep_len / fuse_updates) sess.run calls and no Python
+            # per-step loop. Calls are pipelined through the worker so this
+            # thread can sample the remainder while a block is in flight.
+            n_fused, n_rest = divmod(ep_len, fuse_updates)
+            future = None
+            for j in range(n_fused):
+                if future is not None:
+                    log_update(future.result())
+                future = update_pool.submit(fused_train_step)
+
+            if n_rest:
+                rest = replay_buffer.sample_batch(n_rest * batch_size)
+                if future is not None:
+                    log_update(future.result())
+                future = update_pool.submit(fused_train_rest, rest['obs1'], rest['obs2'],
+                                            rest['acts'], rest['rews'], rest['done'])
+
+            # drain the last in-flight update before episode bookkeeping
+            if future is not None:
+                log_update(future.result())
 
             logger.store(EpRet=ep_ret, EpLen=ep_len)
             o, r, d, ep_ret, ep_len = env.reset(), 0, False, 0, 0
@@ -313,7 +560,15 @@ def sac1(env_fn, actor_critic=core.mlp_actor_critic, ac_kwargs=dict(), seed=0,
             #     logger.save_state({'env': env}, None)
 
             # Test the performance of the deterministic version of the agent.
-            test_agent(1)
+            # Rollouts run on a background thread so they overlap the next
+            # epoch of training; we join the thread launched at the previous
+            # epoch boundary here, so TestEpRet lags the policy by one epoch.
+            if test_thread is not None:
+                test_thread.join()
+            else:
+                # very first epoch: no background results yet
+                sess.run(snapshot_policy)
+                test_agent(1)
 
             # logger.store(): store the data; logger.log_tabular(): log the data; logger.dump_tabular(): write the data
             # Log info about epoch
@@ -335,6 +590,16 @@ def sac1(env_fn, actor_critic=core.mlp_actor_critic, ac_kwargs=dict(), seed=0,
             logger.log_tabular('Time', time.time()-start_time)
             logger.dump_tabular()
 
+            # Kick off the next round of test rollouts; training continues
+            # while they run (started after dump_tabular so their stats can't
+            # bleed into the epoch just logged). Snapshotting here is safe:
+            # the previous thread is joined, and no update is in flight at
+            # the epoch boundary, so TestEpRet measures exactly the policy
+            # as of this epoch.
+            sess.run(snapshot_policy)
+            test_thread = threading.Thread(target=test_agent, args=(1,))
+            test_thread.start()
+
 if __name__ == '__main__':
     import argparse
     parser = argparse.ArgumentParser()
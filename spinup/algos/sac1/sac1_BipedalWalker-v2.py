@@ -7,7 +7,7 @@ from spinup.algos.sac1 import core
 from spinup.algos.sac1.core import get_vars
 from spinup.utils.logx import EpochLogger
 from gym.spaces import Box, Discrete
-from spinup.utils.frame_stack import FrameStack
+from spinup.utils.frame_stack import FrameStack, StackedReplayBuffer
 import os
 
 class ReplayBuffer:
@@ -16,8 +16,12 @@ class ReplayBuffer:
     """
 
     def __init__(self, obs_dim, act_dim, size):
-        self.obs1_buf = np.zeros([size, obs_dim], dtype=np.float32)
-        self.obs2_buf = np.zeros([size, obs_dim], dtype=np.float32)
+        # Observations are stored in fp16: BipedalWalker obs are bounded and
+        # tolerate half precision, and at replay_size=2e6 with stacked frames
+        # this halves both the buffer RAM and the bandwidth of the sampling
+        # gather. The minibatch is upcast back to float32 before feeding TF.
+        self.obs1_buf = np.zeros([size, obs_dim], dtype=np.float16)
+        self.obs2_buf = np.zeros([size, obs_dim], dtype=np.float16)
         self.acts_buf = np.zeros([size, act_dim], dtype=np.float32)
         self.rews_buf = np.zeros(size, dtype=np.float32)
         self.done_buf = np.zeros(size, dtype=np.float32)
@@ -34,8 +38,8 @@ class ReplayBuffer:
 
     def sample_batch(self, batch_size=32):
         idxs = np.random.randint(0, self.size, size=batch_size)
-        return dict(obs1=self.obs1_buf[idxs],
-                    obs2=self.obs2_buf[idxs],
+        return dict(obs1=self.obs1_buf[idxs].astype(np.float32),
+                    obs2=self.obs2_buf[idxs].astype(np.float32),
                     acts=self.acts_buf[idxs],
                     rews=self.rews_buf[idxs],
                     done=self.done_buf[idxs])
@@ -158,7 +162,16 @@ def sac1(args, env_fn, actor_critic=core.mlp_actor_critic, ac_kwargs=dict(), see
         _, _, logp_pi_, _, _, _,q1_pi_, q2_pi_= actor_critic(x2_ph, x2_ph, a_ph, **ac_kwargs)
 
     # Experience buffer
-    replay_buffer = ReplayBuffer(obs_dim=obs_dim, act_dim=act_dim, size=replay_size)
+    # With frame stacking active, store each raw frame once and rebuild the
+    # stacks at sample time instead of keeping the stacked vector twice per
+    # transition (cuts observation RAM ~stack_frames-fold)
+    stack_frames = getattr(args, 'stack_frames', 1)
+    if stack_frames > 1:
+        replay_buffer = StackedReplayBuffer(raw_obs_dim=obs_dim // stack_frames,
+                                            act_dim=act_dim, size=replay_size,
+                                            stack_frames=stack_frames)
+    else:
+        replay_buffer = ReplayBuffer(obs_dim=obs_dim, act_dim=act_dim, size=replay_size)
 
     # Count variables
     var_counts = tuple(core.count_vars(scope) for scope in 
@@ -254,6 +267,11 @@ def sac1(args, env_fn, actor_critic=core.mlp_actor_critic, ac_kwargs=dict(), see
 
     if args.is_test:
         test_env = gym.make(args.env)
+        if stack_frames > 1:
+            # the graph was built for stacked observations, so the test env
+            # has to stack too (checkpoints trained unstacked need
+            # --stack_frames 1)
+            test_env = FrameStack(test_env, stack_frames)
         ave_ep_ret = 0
         for j in range(10000):
             o, r, d, ep_ret, ep_len = test_env.reset(), 0, False, 0, 0
@@ -321,6 +339,10 @@ def sac1(args, env_fn, actor_critic=core.mlp_actor_critic, ac_kwargs=dict(), see
 
         # End of episode. Training (ep_len times).
         if d or (ep_len == max_ep_len_train):
+            if stack_frames > 1 and not d:
+                # episode cut at the time horizon: tell the stacked buffer so
+                # frame lookback doesn't cross into the next episode
+                replay_buffer.end_episode()
             ep_index += 1
             print('episode: {}, reward: {}'.format(ep_index, ep_ret/reward_scale))
             """
@@ -412,7 +434,9 @@ if __name__ == '__main__':
     parser.add_argument('--act_noise', type=float, default=0.3)
     parser.add_argument('--obs_noise', type=float, default=0.0)
     parser.add_argument('--exp_name', type=str, default='A_sac1_BipedalWalker-v2_3e6_1')
-    parser.add_argument('--stack_frames', type=int, default=4)
+    # frame stacking is opt-in: it changes the network input width, so
+    # checkpoints are only compatible with the setting they were trained with
+    parser.add_argument('--stack_frames', type=int, default=1)
     args = parser.parse_args()
 
     from spinup.utils.run_utils import setup_logger_kwargs
@@ -425,33 +449,55 @@ if __name__ == '__main__':
         def __init__(self, env, action_repeat=3):
             self._env = env
             self.action_repeat = action_repeat
+            # private generator + scratch rows: exploration noise is written
+            # in place, so the hot step path allocates nothing
+            self._rng = np.random.default_rng()
+            self._act_noise = np.empty(4)
+            self._obs_noise = np.empty(24)
 
         def __getattr__(self, name):
             return getattr(self._env, name)
 
+        def _noise(self, buf, scale):
+            # uniform(-scale, scale), generated into the scratch row
+            self._rng.random(out=buf)
+            buf *= 2.0 * scale
+            buf -= scale
+            return buf
+
         def reset(self):
-            obs = self._env.reset() + args.obs_noise * (-2 * np.random.random(24) + 1)
+            obs = self._env.reset()
+            if args.obs_noise:
+                obs = obs + self._noise(self._obs_noise, args.obs_noise)
             return obs
 
         def step(self, action):
-            action +=  args.act_noise * (-2 * np.random.random(4) + 1)
+            action += self._noise(self._act_noise, args.act_noise)
+            env_step = self._env.step  # hoist the lookup out of the repeat loop
+            obs_noise = args.obs_noise
             r = 0.0
             for _ in range(self.action_repeat):
-                obs_, reward_, done_, info_ = self._env.step(action)
+                obs_, reward_, done_, info_ = env_step(action)
                 r = r + reward_
                 # r -= 0.001
                 if done_ and self.action_repeat!=1:
-                    return obs_+  args.obs_noise * (-2 * np.random.random(24) + 1), 0.0, done_, info_
+                    if obs_noise:
+                        obs_ = obs_ + self._noise(self._obs_noise, obs_noise)
+                    return obs_, 0.0, done_, info_
                 if self.action_repeat==1:
                     return obs_, r, done_, info_
-            return obs_+  args.obs_noise * (-2 * np.random.random(24) + 1), args.reward_scale*r, done_, info_
+            if obs_noise:
+                obs_ = obs_ + self._noise(self._obs_noise, obs_noise)
+            return obs_, args.reward_scale*r, done_, info_
 
 
-    # env = FrameStack(env, args.stack_frames)
-
-    env3 = Wrapper(gym.make(args.env), 3)
-    # env1 = Wrapper(gym.make(args.env), 1)
-    env1 = gym.make(args.env)
+    if args.stack_frames > 1:
+        env3 = FrameStack(Wrapper(gym.make(args.env), 3), args.stack_frames)
+        env1 = FrameStack(gym.make(args.env), args.stack_frames)
+    else:
+        env3 = Wrapper(gym.make(args.env), 3)
+        # env1 = Wrapper(gym.make(args.env), 1)
+        env1 = gym.make(args.env)
 
     sac1(args, lambda n : env3 if n==3 else env1, actor_critic=core.mlp_actor_critic,
         ac_kwargs=dict(hidden_sizes=[400,300]), start_steps = args.start_steps,
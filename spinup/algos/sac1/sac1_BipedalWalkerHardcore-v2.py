@@ -8,6 +8,7 @@ from spinup.algos.sac1.core import get_vars
 from spinup.utils.logx import EpochLogger
 from gym.spaces import Box, Discrete
 from spinup.utils.frame_stack import FrameStack
+from spinup.utils.vec_env import SubprocVecEnv, DummyVecEnv
 import os
 
 
@@ -37,6 +38,18 @@ class ReplayBuffer:
         self.ptr = (self.ptr + 1) % self.max_size
         self.size = min(self.size + 1, self.max_size)
 
+    def store_batch(self, obs, acts, rews, next_obs, dones):
+        # Batched store for vectorized envs: one fancy-indexed write per field
+        n = len(rews)
+        idxs = (self.ptr + np.arange(n)) % self.max_size
+        self.obs1_buf[idxs] = obs
+        self.obs2_buf[idxs] = next_obs
+        self.acts_buf[idxs] = acts
+        self.rews_buf[idxs] = rews
+        self.done_buf[idxs] = dones
+        self.ptr = (self.ptr + n) % self.max_size
+        self.size = min(self.size + n, self.max_size)
+
     def sample_batch(self, batch_size=32):
         idxs = np.random.randint(0, self.size, size=batch_size)
         return dict(obs1=self.obs1_buf[idxs],
@@ -252,7 +265,10 @@ def sac1(args, env_fn, actor_critic=core.mlp_actor_critic, ac_kwargs=dict(), see
 
     def get_action(o, deterministic=False):
         act_op = mu if deterministic else pi
-        return sess.run(act_op, feed_dict={x_ph: o.reshape(1, -1)})[0]
+        if o.ndim == 1:
+            return sess.run(act_op, feed_dict={x_ph: o.reshape(1, -1)})[0]
+        # batched inference for the vectorized training envs
+        return sess.run(act_op, feed_dict={x_ph: o})
 
 
 
@@ -289,26 +305,30 @@ def sac1(args, env_fn, actor_critic=core.mlp_actor_critic, ac_kwargs=dict(), see
             logger.store(TestEpRet=ep_ret, TestEpLen=ep_len)
 
     start_time = time.time()
-    o, r, d, ep_ret, ep_len = env.reset(), 0, False, 0, 0
+    n_envs = env.num_envs
+    o = env.reset()
+    ep_ret = np.zeros(n_envs)
+    ep_len = np.zeros(n_envs, dtype=np.int64)
     total_steps = steps_per_epoch * epochs
 
     test_ep_ret_best = test_ep_ret = -10000.0
 
-    # Main loop: collect experience in env and update/log each epoch
+    # Main loop: every iteration steps all n_envs workers once in parallel,
+    # so each t collects n_envs transitions
     for t in range(total_steps):
 
         """
         Until start_steps have elapsed, randomly sample actions
-        from a uniform distribution for better exploration. Afterwards, 
-        use the learned policy. 
+        from a uniform distribution for better exploration. Afterwards,
+        use the learned policy.
         """
-        if t > start_steps:
+        if t * n_envs > start_steps:
             a = get_action(o)
         else:
-            a = env.action_space.sample()
+            a = np.stack([env.action_space.sample() for _ in range(n_envs)])
 
-        # Step the env
-        o2, r, d, _ = env.step(a)
+        # Step the envs
+        o2, r, d, infos = env.step(a)
         ep_ret += r
         ep_len += 1
 
@@ -317,36 +337,46 @@ def sac1(args, env_fn, actor_critic=core.mlp_actor_critic, ac_kwargs=dict(), see
         # that isn't based on the agent's state)
         # d = False if ep_len==max_ep_len_train else d
 
-        # Store experience to replay buffer
-        replay_buffer.store(o, a, r, o2, d)
+        # Store experience to replay buffer. Done workers have already
+        # auto-reset, so recover the true terminal observation from info.
+        if d.any():
+            o2_store = o2.copy()
+            for i in np.nonzero(d)[0]:
+                o2_store[i] = infos[i]['terminal_observation']
+        else:
+            o2_store = o2
+        replay_buffer.store_batch(o, a, r, o2_store, d)
 
         # Super critical, easy to overlook step: make sure to update
         # most recent observation!
         o = o2
 
-        # End of episode. Training (ep_len times).
-        if d or (ep_len == max_ep_len_train):
-            """
-            Perform all SAC updates at the end of the trajectory.
-            This is a slight difference from the SAC specified in the
-            original paper.
-            """
-            for j in range(ep_len):
-                batch = replay_buffer.sample_batch(batch_size)
-                feed_dict = {x_ph: batch['obs1'],
-                             x2_ph: batch['obs2'],
-                             a_ph: batch['acts'],
-                             r_ph: batch['rews'],
-                             d_ph: batch['done'],
-                             }
-                # step_ops = [pi_loss, q1_loss, q2_loss, q1, q2, logp_pi, alpha, train_pi_op, train_value_op, target_update]
-                outs = sess.run(step_ops, feed_dict)
-                logger.store(LossPi=outs[0], LossQ1=outs[1], LossQ2=outs[2],
-                             Q1Vals=outs[3], Q2Vals=outs[4],
-                             LogPi=outs[5], Alpha=outs[6])
-
-            logger.store(EpRet=ep_ret / reward_scale, EpLen=ep_len)
-            o, r, d, ep_ret, ep_len = env.reset(), 0, False, 0, 0
+        # End of episode. Training (ep_len times per finished worker).
+        for i in range(n_envs):
+            if d[i] or (ep_len[i] == max_ep_len_train):
+                if not d[i]:
+                    o[i] = env.reset_one(i)
+                """
+                Perform all SAC updates at the end of the trajectory.
+                This is a slight difference from the SAC specified in the
+                original paper.
+                """
+                for j in range(int(ep_len[i])):
+                    batch = replay_buffer.sample_batch(batch_size)
+                    feed_dict = {x_ph: batch['obs1'],
+                                 x2_ph: batch['obs2'],
+                                 a_ph: batch['acts'],
+                                 r_ph: batch['rews'],
+                                 d_ph: batch['done'],
+                                 }
+                    # step_ops = [pi_loss, q1_loss, q2_loss, q1, q2, logp_pi, alpha, train_pi_op, train_value_op, target_update]
+                    outs = sess.run(step_ops, feed_dict)
+                    logger.store(LossPi=outs[0], LossQ1=outs[1], LossQ2=outs[2],
+                                 Q1Vals=outs[3], Q2Vals=outs[4],
+                                 LogPi=outs[5], Alpha=outs[6])
+
+                logger.store(EpRet=ep_ret[i] / reward_scale, EpLen=ep_len[i])
+                ep_ret[i], ep_len[i] = 0, 0
 
         # End of epoch wrap-up
         if t > 0 and t % steps_per_epoch == 0:
@@ -370,7 +400,7 @@ def sac1(args, env_fn, actor_critic=core.mlp_actor_critic, ac_kwargs=dict(), see
             logger.log_tabular('TestEpRet', with_min_and_max=True)
             logger.log_tabular('EpLen', average_only=True)
             logger.log_tabular('TestEpLen', average_only=True)
-            logger.log_tabular('TotalEnvInteracts', t)
+            logger.log_tabular('TotalEnvInteracts', t * n_envs)
             logger.log_tabular('Alpha', average_only=True)
             logger.log_tabular('Q1Vals', with_min_and_max=False)
             logger.log_tabular('Q2Vals', with_min_and_max=True)
@@ -415,6 +445,8 @@ if __name__ == '__main__':
     parser.add_argument('--reward_scale', type=float, default=5.0)
     parser.add_argument('--act_noise', type=float, default=0.3)
     parser.add_argument('--obs_noise', type=float, default=0.0)
+    parser.add_argument('--n_envs', type=int, default=1,
+                        help="number of parallel training envs (SubprocVecEnv workers)")
     parser.add_argument('--exp_name', type=str, default='A_sac1_BipedalWalkerHardcore-v2_stump622_2e6_alphaauto_2')
 
     args = parser.parse_args()
@@ -429,31 +461,59 @@ if __name__ == '__main__':
         def __init__(self, env, action_repeat=3):
             self._env = env
             self.action_repeat = action_repeat
+            # private generator + scratch rows: exploration noise is written
+            # in place, so the hot step path allocates nothing
+            self._rng = np.random.default_rng()
+            self._act_noise = np.empty(4)
+            self._obs_noise = np.empty(24)
 
         def __getattr__(self, name):
             return getattr(self._env, name)
 
+        def _noise(self, buf, scale):
+            # uniform(-scale, scale), generated into the scratch row
+            self._rng.random(out=buf)
+            buf *= 2.0 * scale
+            buf -= scale
+            return buf
+
         def reset(self):
-            obs = self._env.reset() + args.obs_noise * (-2 * np.random.random(24) + 1)
+            obs = self._env.reset()
+            if args.obs_noise:
+                obs = obs + self._noise(self._obs_noise, args.obs_noise)
             return obs
 
         def step(self, action):
-            action += args.act_noise * (-2 * np.random.random(4) + 1)
+            action += self._noise(self._act_noise, args.act_noise)
+            env_step = self._env.step  # hoist the lookup out of the repeat loop
+            obs_noise = args.obs_noise
             r = 0.0
             for _ in range(self.action_repeat):
-                obs_, reward_, done_, info_ = self._env.step(action)
+                obs_, reward_, done_, info_ = env_step(action)
                 r = r + reward_
                 # r -= 0.001
                 if done_ and self.action_repeat != 1:
-                    return obs_ + args.obs_noise * (-2 * np.random.random(24) + 1), 0.0, done_, info_
+                    if obs_noise:
+                        obs_ = obs_ + self._noise(self._obs_noise, obs_noise)
+                    return obs_, 0.0, done_, info_
                 if self.action_repeat == 1:
                     return obs_, r, done_, info_
-            return obs_ + args.obs_noise * (-2 * np.random.random(24) + 1), args.reward_scale * r, done_, info_
+            if obs_noise:
+                obs_ = obs_ + self._noise(self._obs_noise, obs_noise)
+            return obs_, args.reward_scale * r, done_, info_
 
 
     # env = FrameStack(env, args.stack_frames)
 
-    env3 = Wrapper(gym.make(args.env), 3)
+    def make_train_env():
+        return Wrapper(gym.make(args.env), 3)
+
+    # N training envs stepping in parallel worker processes; a single env
+    # per process is enough when n_envs=1, so skip the IPC overhead then
+    if args.n_envs > 1:
+        env3 = SubprocVecEnv([make_train_env] * args.n_envs)
+    else:
+        env3 = DummyVecEnv([make_train_env])
     env1 = gym.make(args.env)
 
     sac1(args, lambda n: env3 if n == 3 else env1, actor_critic=core.mlp_actor_critic,
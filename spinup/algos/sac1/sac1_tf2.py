@@ -0,0 +1,305 @@
+import numpy as np
+import tensorflow as tf
+from numbers import Number
+import gym
+import time
+from spinup.utils.logx import EpochLogger
+
+"""
+
+Soft Actor-Critic ported to TF2 eager + tf.function.
+
+Same algorithm as sac1.py, but the whole update step (actor, critics,
+alpha and polyak target update) lives inside one @tf.function, so each
+training step is a single traced graph call instead of a feed_dict'd
+sess.run. Requires tensorflow>=2.0; the TF1 implementation in sac1.py
+is unchanged.
+
+"""
+
+EPS = 1e-8
+
+LOG_STD_MAX = 2
+LOG_STD_MIN = -20
+
+
+class ReplayBuffer:
+    """
+    A simple FIFO experience replay buffer for SAC agents.
+    """
+
+    def __init__(self, obs_dim, act_dim, size, batch_size=100):
+        self.obs1_buf = np.zeros([size, obs_dim], dtype=np.float32)
+        self.obs2_buf = np.zeros([size, obs_dim], dtype=np.float32)
+        self.acts_buf = np.zeros([size, act_dim], dtype=np.float32)
+        self.rews_buf = np.zeros(size, dtype=np.float32)
+        self.done_buf = np.zeros(size, dtype=np.float32)
+        self.ptr, self.size, self.max_size = 0, 0, size
+        self._idxs = np.zeros(batch_size, dtype=np.int64)
+        self._batch = dict(obs1=np.empty([batch_size, obs_dim], dtype=np.float32),
+                           obs2=np.empty([batch_size, obs_dim], dtype=np.float32),
+                           acts=np.empty([batch_size, act_dim], dtype=np.float32),
+                           rews=np.empty(batch_size, dtype=np.float32),
+                           done=np.empty(batch_size, dtype=np.float32))
+
+    def store(self, obs, act, rew, next_obs, done):
+        self.obs1_buf[self.ptr] = obs
+        self.obs2_buf[self.ptr] = next_obs
+        self.acts_buf[self.ptr] = act
+        self.rews_buf[self.ptr] = rew
+        self.done_buf[self.ptr] = done
+        self.ptr = (self.ptr+1) % self.max_size
+        self.size = min(self.size+1, self.max_size)
+
+    def sample_batch(self, batch_size=32):
+        idxs = self._idxs
+        idxs[:] = np.random.randint(0, self.size, size=batch_size)
+        batch = self._batch
+        np.take(self.obs1_buf, idxs, axis=0, out=batch['obs1'])
+        np.take(self.obs2_buf, idxs, axis=0, out=batch['obs2'])
+        np.take(self.acts_buf, idxs, axis=0, out=batch['acts'])
+        np.take(self.rews_buf, idxs, axis=0, out=batch['rews'])
+        np.take(self.done_buf, idxs, axis=0, out=batch['done'])
+        return batch
+
+
+def mlp(hidden_sizes, activation, output_dim=None, output_activation=None):
+    layers = [tf.keras.layers.Dense(h, activation=activation) for h in hidden_sizes]
+    if output_dim is not None:
+        layers.append(tf.keras.layers.Dense(output_dim, activation=output_activation))
+    return tf.keras.Sequential(layers)
+
+
+def gaussian_likelihood(x, mu, log_std):
+    pre_sum = -0.5 * (((x-mu)/(tf.exp(log_std)+EPS))**2 + 2*log_std + np.log(2*np.pi))
+    return tf.reduce_sum(pre_sum, axis=1)
+
+
+class Actor(tf.keras.Model):
+
+    def __init__(self, act_dim, act_limit, hidden_sizes=(400, 300), activation=tf.nn.relu):
+        super(Actor, self).__init__()
+        self.net = mlp(hidden_sizes, activation)
+        self.mu_layer = tf.keras.layers.Dense(act_dim)
+        # tanh-squashed log_std, same trick as core.mlp_gaussian_policy
+        self.log_std_layer = tf.keras.layers.Dense(act_dim, activation=tf.tanh)
+        self.act_limit = act_limit
+
+    def call(self, x):
+        net = self.net(x)
+        mu = self.mu_layer(net)
+        log_std = LOG_STD_MIN + 0.5 * (LOG_STD_MAX - LOG_STD_MIN) * (self.log_std_layer(net) + 1)
+        std = tf.exp(log_std)
+        pi = mu + tf.random.normal(tf.shape(mu)) * std
+        logp_pi = gaussian_likelihood(pi, mu, log_std)
+        # squash and correct the log-prob
+        mu, pi = tf.tanh(mu), tf.tanh(pi)
+        logp_pi -= tf.reduce_sum(tf.math.log(tf.clip_by_value(1 - pi**2, 0, 1) + 1e-6), axis=1)
+        return self.act_limit * mu, self.act_limit * pi, logp_pi
+
+
+class Critic(tf.keras.Model):
+
+    def __init__(self, hidden_sizes=(400, 300), activation=tf.nn.relu):
+        super(Critic, self).__init__()
+        self.net = mlp(hidden_sizes, activation, output_dim=1)
+
+    def call(self, x, a):
+        return tf.squeeze(self.net(tf.concat([x, a], axis=-1)), axis=1)
+
+
+def sac1_tf2(env_fn, hidden_sizes=(400, 300), seed=0,
+        steps_per_epoch=5000, epochs=100, replay_size=int(1e6), gamma=0.99,
+        polyak=0.995, lr=1e-4, alpha=0.2, batch_size=150, start_steps=10000,
+        max_ep_len=1000, logger_kwargs=dict(), save_freq=1):
+    """
+    Soft Actor-Critic (tf.function version).
+
+    Hyperparameters have the same meaning as in ``sac1.sac1``; the
+    ``actor_critic`` hook is replaced by ``hidden_sizes`` since the
+    networks are built as keras models here.
+    """
+
+    logger = EpochLogger(**logger_kwargs)
+    logger.save_config(locals())
+
+    tf.random.set_seed(seed)
+    np.random.seed(seed)
+
+    env, test_env = env_fn(), env_fn()
+    obs_dim = env.observation_space.shape[0]
+    act_dim = env.action_space.shape[0]
+
+    # Action limit for clamping: critically, assumes all dimensions share the same bound!
+    act_limit = env.action_space.high[0]
+
+    actor = Actor(act_dim, act_limit, hidden_sizes)
+    q1, q2 = Critic(hidden_sizes), Critic(hidden_sizes)
+    q1_targ, q2_targ = Critic(hidden_sizes), Critic(hidden_sizes)
+
+    # Build all variables, then initialize targets to match main
+    dummy_x = tf.zeros((1, obs_dim))
+    dummy_a = tf.zeros((1, act_dim))
+    actor(dummy_x)
+    for net in (q1, q2, q1_targ, q2_targ):
+        net(dummy_x, dummy_a)
+    for v_main, v_targ in zip(q1.variables + q2.variables,
+                              q1_targ.variables + q2_targ.variables):
+        v_targ.assign(v_main)
+
+    # Experience buffer
+    replay_buffer = ReplayBuffer(obs_dim=obs_dim, act_dim=act_dim, size=replay_size,
+                                 batch_size=batch_size)
+
+    auto_alpha = (alpha == 'auto')
+    if auto_alpha:
+        target_entropy = -np.prod(env.action_space.shape)
+        log_alpha = tf.Variable(0.0, dtype=tf.float32, name='log_alpha')
+        alpha_optimizer = tf.keras.optimizers.Adam(learning_rate=lr)
+
+    pi_optimizer = tf.keras.optimizers.Adam(learning_rate=lr)
+    value_optimizer = tf.keras.optimizers.Adam(learning_rate=lr)
+
+    value_params = q1.trainable_variables + q2.trainable_variables
+
+    @tf.function
+    def train_step(obs1, obs2, acts, rews, done):
+        cur_alpha = tf.exp(log_alpha) if auto_alpha else tf.constant(alpha, tf.float32)
+
+        # targets (no gradient)
+        _, pi2, logp_pi2 = actor(obs2)
+        min_q_pi = tf.minimum(q1_targ(obs2, pi2), q2_targ(obs2, pi2))
+        q_backup = rews + gamma * (1 - done) * (min_q_pi - cur_alpha * logp_pi2)
+
+        with tf.GradientTape() as pi_tape:
+            _, pi, logp_pi = actor(obs1)
+            pi_loss = tf.reduce_mean(cur_alpha * logp_pi - q1(obs1, pi))
+        pi_grads = pi_tape.gradient(pi_loss, actor.trainable_variables)
+        pi_optimizer.apply_gradients(zip(pi_grads, actor.trainable_variables))
+
+        with tf.GradientTape() as q_tape:
+            q1_loss = 0.5 * tf.reduce_mean((q_backup - q1(obs1, acts))**2)
+            q2_loss = 0.5 * tf.reduce_mean((q_backup - q2(obs1, acts))**2)
+            value_loss = q1_loss + q2_loss
+        q_grads = q_tape.gradient(value_loss, value_params)
+        value_optimizer.apply_gradients(zip(q_grads, value_params))
+
+        if auto_alpha:
+            with tf.GradientTape() as a_tape:
+                alpha_loss = tf.reduce_mean(-log_alpha * tf.stop_gradient(logp_pi + target_entropy))
+            alpha_grads = a_tape.gradient(alpha_loss, [log_alpha])
+            alpha_optimizer.apply_gradients(zip(alpha_grads, [log_alpha]))
+
+        # Polyak averaging for target variables
+        for v_main, v_targ in zip(q1.variables + q2.variables,
+                                  q1_targ.variables + q2_targ.variables):
+            v_targ.assign(polyak * v_targ + (1 - polyak) * v_main)
+
+        return pi_loss, q1_loss, q2_loss, \
+               tf.reduce_mean(q1(obs1, acts)), tf.reduce_mean(q2(obs1, acts)), \
+               tf.reduce_mean(logp_pi), cur_alpha
+
+    # deterministic is a Python bool on purpose: tf.function traces the two
+    # variants once each instead of running a tf.cond every call
+    @tf.function
+    def policy(x, deterministic=False):
+        mu, pi, _ = actor(x)
+        return mu if deterministic else pi
+
+    def get_action(o, deterministic=False):
+        return policy(o.reshape(1, -1).astype(np.float32), deterministic).numpy()[0]
+
+    def test_agent(n=10):
+        for j in range(n):
+            o, r, d, ep_ret, ep_len = test_env.reset(), 0, False, 0, 0
+            while not(d or (ep_len == max_ep_len)):
+                # Take deterministic actions at test time
+                o, r, d, _ = test_env.step(get_action(o, True))
+                ep_ret += r
+                ep_len += 1
+            logger.store(TestEpRet=ep_ret, TestEpLen=ep_len)
+
+    start_time = time.time()
+    o, r, d, ep_ret, ep_len = env.reset(), 0, False, 0, 0
+    total_steps = steps_per_epoch * epochs
+
+    # Main loop: collect experience in env and update/log each epoch
+    for t in range(total_steps):
+
+        if t > start_steps:
+            a = get_action(o)
+        else:
+            a = env.action_space.sample()
+
+        # Step the env
+        o2, r, d, _ = env.step(a)
+        ep_ret += r
+        ep_len += 1
+
+        # Ignore the "done" signal if it comes from hitting the time horizon
+        d = False if ep_len == max_ep_len else d
+
+        replay_buffer.store(o, a, r, o2, d)
+        o = o2
+
+        # End of episode. Training (ep_len times).
+        if d or (ep_len == max_ep_len):
+            for j in range(ep_len):
+                batch = replay_buffer.sample_batch(batch_size)
+                outs = train_step(tf.constant(batch['obs1']), tf.constant(batch['obs2']),
+                                  tf.constant(batch['acts']), tf.constant(batch['rews']),
+                                  tf.constant(batch['done']))
+                logger.store(LossPi=outs[0].numpy(), LossQ1=outs[1].numpy(),
+                             LossQ2=outs[2].numpy(),
+                             Q1Vals=outs[3].numpy(), Q2Vals=outs[4].numpy(),
+                             LogPi=outs[5].numpy(), Alpha=outs[6].numpy())
+
+            logger.store(EpRet=ep_ret, EpLen=ep_len)
+            o, r, d, ep_ret, ep_len = env.reset(), 0, False, 0, 0
+
+        # End of epoch wrap-up
+        if t > 0 and t % steps_per_epoch == 0:
+            epoch = t // steps_per_epoch
+
+            test_agent(1)
+
+            logger.log_tabular('Epoch', epoch)
+            logger.log_tabular('EpRet', with_min_and_max=True)
+            logger.log_tabular('TestEpRet', with_min_and_max=True)
+            logger.log_tabular('EpLen', average_only=True)
+            logger.log_tabular('TestEpLen', average_only=True)
+            logger.log_tabular('TotalEnvInteracts', t)
+            logger.log_tabular('Alpha', average_only=True)
+            logger.log_tabular('Q1Vals', with_min_and_max=True)
+            logger.log_tabular('Q2Vals', with_min_and_max=True)
+            logger.log_tabular('LogPi', with_min_and_max=True)
+            logger.log_tabular('LossPi', average_only=True)
+            logger.log_tabular('LossQ1', average_only=True)
+            logger.log_tabular('LossQ2', average_only=True)
+            logger.log_tabular('Time', time.time()-start_time)
+            logger.dump_tabular()
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--env', type=str, default='HalfCheetah-v2')
+    parser.add_argument('--hid', type=int, default=300)
+    parser.add_argument('--l', type=int, default=1)
+    parser.add_argument('--gamma', type=float, default=0.99)
+    parser.add_argument('--seed', '-s', type=int, default=0)
+    parser.add_argument('--epochs', type=int, default=10000)
+    parser.add_argument('--alpha', default='auto', help="alpha can be either 'auto' or float(e.g:0.2).")
+    name = 'sac1_tf2_{}_alpha_{}_seed_{}'.format(
+        parser.parse_args().env,
+        parser.parse_args().alpha,
+        parser.parse_args().seed)
+    parser.add_argument('--exp_name', type=str, default=name)
+    args = parser.parse_args()
+
+    from spinup.utils.run_utils import setup_logger_kwargs
+    logger_kwargs = setup_logger_kwargs(args.exp_name, args.seed)
+
+    sac1_tf2(lambda : gym.make(args.env), hidden_sizes=(400, 300),
+        gamma=args.gamma, seed=args.seed, epochs=args.epochs, alpha=args.alpha,
+        logger_kwargs=logger_kwargs)
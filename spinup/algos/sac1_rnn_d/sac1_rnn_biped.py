@@ -576,14 +576,27 @@ if __name__ == '__main__':
             self.action_dim = env.action_space.shape[0]
             self.obs_dim = env.action_space.shape[0] + env.observation_space.shape[0]
             self.observation_space = Box(-np.inf, np.inf, shape=(self.obs_dim,), dtype=np.float32)
+            self._raw_obs_dim = env.observation_space.shape[0]
 
         def __getattr__(self, name):
             return getattr(self._env, name)
 
+        def _pack(self, obs, action=None):
+            # each call returns a fresh row (one allocation, no np.append
+            # tuple/concat machinery): the trainer queues up to Lb+Lt+1 of
+            # these observations before stacking them into the replay
+            # buffer, so a reused scratch row would alias every queued entry
+            out = np.empty(self.obs_dim, dtype=np.float32)
+            out[:self._raw_obs_dim] = obs
+            if action is None:
+                out[self._raw_obs_dim:] = 0.0
+            else:
+                out[self._raw_obs_dim:] = np.ravel(action)
+            return out
+
         def reset(self):
             obs = self._env.reset()
-            obs = np.append(obs, np.zeros(self.action_dim))
-            return obs
+            return self._pack(obs)
 
         def step(self, action):
             r = 0.0
@@ -592,10 +605,8 @@ if __name__ == '__main__':
                 r = r + reward_
                 # r -= 0.001
                 if done_:
-                    obs_ = np.append(obs_, action.reshape(self.action_dim))
-                    return obs_, 0.0, done_, info_
-            obs_ = np.append(obs_, action.reshape(self.action_dim))
-            return obs_, r, done_, info_
+                    return self._pack(obs_, action), 0.0, done_, info_
+            return self._pack(obs_, action), r, done_, info_
 
 
     sac1_rnn(lambda n: Wrapper1(gym.make(args.env),action_repeat=n), # lambda:Wrapper(gym.make(args.env)), #
@@ -37,6 +37,77 @@ class FrameStack(gym.Wrapper):
         return np.stack(self.frames, axis=0).reshape((self.obs_dim,))
 
 
+class StackedReplayBuffer:
+    """
+    FIFO replay buffer for FrameStack'd observations that stores each raw
+    frame once instead of the full stacked vector twice per transition.
+    Only the newest frame of obs and next_obs is written on store (the
+    rest already live in earlier entries); stacks are rebuilt at sample
+    time by gathering the N-1 preceding frames, clamped at episode starts
+    the same way FrameStack pads by repeating the reset frame. At
+    stack_frames=N this cuts the observation storage (and the store-time
+    memcpy) by a factor of N.
+    """
+
+    def __init__(self, raw_obs_dim, act_dim, size, stack_frames, obs_dtype=np.float16):
+        self.raw_obs_dim = raw_obs_dim
+        self.stack_frames = stack_frames
+        self.frames1_buf = np.zeros([size, raw_obs_dim], dtype=obs_dtype)  # frame at time t
+        self.frames2_buf = np.zeros([size, raw_obs_dim], dtype=obs_dtype)  # frame at time t+1
+        self.acts_buf = np.zeros([size, act_dim], dtype=np.float32)
+        self.rews_buf = np.zeros(size, dtype=np.float32)
+        self.done_buf = np.zeros(size, dtype=np.float32)
+        self.t_buf = np.zeros(size, dtype=np.int64)  # timestep within episode
+        self.ptr, self.size, self.max_size = 0, 0, size
+        self._ep_t = 0
+
+    def store(self, obs, act, rew, next_obs, done):
+        # the stacked vectors are ordered oldest->newest, so the newest raw
+        # frame is the last raw_obs_dim entries
+        self.frames1_buf[self.ptr] = obs[-self.raw_obs_dim:]
+        self.frames2_buf[self.ptr] = next_obs[-self.raw_obs_dim:]
+        self.acts_buf[self.ptr] = act
+        self.rews_buf[self.ptr] = rew
+        self.done_buf[self.ptr] = done
+        self.t_buf[self.ptr] = self._ep_t
+        self.ptr = (self.ptr+1) % self.max_size
+        self.size = min(self.size+1, self.max_size)
+        self._ep_t = 0 if done else self._ep_t + 1
+
+    def end_episode(self):
+        # call when the trainer cuts an episode without a done from the env
+        # (e.g. at max_ep_len), so lookback doesn't cross into the old episode
+        self._ep_t = 0
+
+    def sample_batch(self, batch_size=32):
+        idxs = np.random.randint(0, self.size, size=batch_size)
+        if self.size == self.max_size:
+            # once the ring has wrapped, entries just behind the write head
+            # have had their lookback frames overwritten; nudge such indices
+            # clear of the head
+            dist = (idxs - self.ptr) % self.max_size
+            bad = dist < self.stack_frames
+            idxs[bad] = (idxs[bad] + self.stack_frames) % self.max_size
+        n, raw = self.stack_frames, self.raw_obs_dim
+        t = self.t_buf[idxs]
+        obs1 = np.empty([batch_size, n*raw], dtype=np.float32)
+        obs2 = np.empty([batch_size, n*raw], dtype=np.float32)
+        for j in range(n):
+            back = n - 1 - j  # stack slots ordered oldest -> newest
+            src = (idxs - np.minimum(back, t)) % self.max_size
+            obs1[:, j*raw:(j+1)*raw] = self.frames1_buf[src]
+            if back == 0:
+                obs2[:, j*raw:(j+1)*raw] = self.frames2_buf[idxs]
+            else:
+                src2 = (idxs - np.minimum(back-1, t)) % self.max_size
+                obs2[:, j*raw:(j+1)*raw] = self.frames1_buf[src2]
+        return dict(obs1=obs1,
+                    obs2=obs2,
+                    acts=self.acts_buf[idxs],
+                    rews=self.rews_buf[idxs],
+                    done=self.done_buf[idxs])
+
+
 
 class MaxMinFilter():
     def __init__(self):
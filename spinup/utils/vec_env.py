@@ -0,0 +1,132 @@
+import numpy as np
+import cloudpickle
+import pickle
+from multiprocessing import Process, Pipe
+
+
+class CloudpickleWrapper(object):
+    """
+    Uses cloudpickle to serialize contents (multiprocessing uses pickle by
+    default, which can't handle lambdas / closures used as env_fns).
+    """
+
+    def __init__(self, fn):
+        self.fn = fn
+
+    def __getstate__(self):
+        return cloudpickle.dumps(self.fn)
+
+    def __setstate__(self, ob):
+        self.fn = pickle.loads(ob)
+
+
+def _worker(remote, parent_remote, env_fn_wrapper):
+    parent_remote.close()
+    env = env_fn_wrapper.fn()
+    try:
+        while True:
+            cmd, data = remote.recv()
+            if cmd == 'step':
+                ob, reward, done, info = env.step(data)
+                if done:
+                    # keep the true terminal observation around for the
+                    # replay buffer, then reset so the worker keeps rolling
+                    info['terminal_observation'] = ob
+                    ob = env.reset()
+                remote.send((ob, reward, done, info))
+            elif cmd == 'reset':
+                remote.send(env.reset())
+            elif cmd == 'get_spaces':
+                remote.send((env.observation_space, env.action_space))
+            elif cmd == 'close':
+                remote.close()
+                break
+    except KeyboardInterrupt:
+        pass
+
+
+class SubprocVecEnv(object):
+    """
+    Runs N copies of an env in worker processes and steps them in lockstep.
+    ``step`` takes a (N, act_dim) array of actions and returns stacked
+    (obs, rews, dones, infos); workers auto-reset on done and report the
+    terminal observation through ``info['terminal_observation']``.
+    """
+
+    def __init__(self, env_fns):
+        self.num_envs = len(env_fns)
+        self.remotes, self.work_remotes = zip(*[Pipe() for _ in env_fns])
+        self.ps = [Process(target=_worker, args=(work_remote, remote, CloudpickleWrapper(fn)),
+                           daemon=True)
+                   for work_remote, remote, fn in zip(self.work_remotes, self.remotes, env_fns)]
+        for p in self.ps:
+            p.start()
+        for remote in self.work_remotes:
+            remote.close()
+        self.remotes[0].send(('get_spaces', None))
+        self.observation_space, self.action_space = self.remotes[0].recv()
+        self.closed = False
+
+    def step(self, actions):
+        for remote, action in zip(self.remotes, actions):
+            remote.send(('step', action))
+        obs, rews, dones, infos = zip(*[remote.recv() for remote in self.remotes])
+        return np.stack(obs), np.asarray(rews, dtype=np.float32), \
+               np.asarray(dones, dtype=np.bool_), list(infos)
+
+    def reset(self):
+        for remote in self.remotes:
+            remote.send(('reset', None))
+        return np.stack([remote.recv() for remote in self.remotes])
+
+    def reset_one(self, i):
+        self.remotes[i].send(('reset', None))
+        return self.remotes[i].recv()
+
+    def close(self):
+        if self.closed:
+            return
+        for remote in self.remotes:
+            remote.send(('close', None))
+        for p in self.ps:
+            p.join()
+        self.closed = True
+
+
+class DummyVecEnv(object):
+    """
+    Same interface as SubprocVecEnv but steps the envs sequentially in the
+    caller's process. Useful for n_envs=1 and for debugging without the
+    multiprocessing overhead.
+    """
+
+    def __init__(self, env_fns):
+        self.envs = [fn() for fn in env_fns]
+        self.num_envs = len(self.envs)
+        self.observation_space = self.envs[0].observation_space
+        self.action_space = self.envs[0].action_space
+
+    def step(self, actions):
+        obs, rews, dones, infos = [], [], [], []
+        for env, action in zip(self.envs, actions):
+            ob, reward, done, info = env.step(action)
+            if done:
+                info['terminal_observation'] = ob
+                ob = env.reset()
+            obs.append(ob)
+            rews.append(reward)
+            dones.append(done)
+            infos.append(info)
+        return np.stack(obs), np.asarray(rews, dtype=np.float32), \
+               np.asarray(dones, dtype=np.bool_), infos
+
+    def reset(self):
+        return np.stack([env.reset() for env in self.envs])
+
+    def reset_one(self, i):
+        return self.envs[i].reset()
+
+    def close(self):
+        for env in self.envs:
+            if hasattr(env, 'close'):
+                env.close()